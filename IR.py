@@ -6,11 +6,14 @@ from Util import *
 from AbstractFlagIndex import *
 
 class FramePoint:
-    def __init__(self, flagIndexType: typing.Type[AbstractFlagIndex], index: int, timestamp: int):
+    def __init__(self, flagIndexType: typing.Type[AbstractFlagIndex], index: int, timestamp: int, flags: typing.Union[typing.List[typing.Any], np.ndarray, None] = None):
         self.flagIndexType: typing.Type[AbstractFlagIndex] = flagIndexType
         self.index: int = index
         self.timestamp: int = timestamp
-        self.flags: typing.List[typing.Any] = self.flagIndexType.getDefaultFlags()
+        # flags may be a row of FPIR.flags, in which case this frame point is a view into the FPIR
+        if flags is None:
+            flags = self.flagIndexType.getDefaultFlags()
+        self.flags: typing.Union[typing.List[typing.Any], np.ndarray] = flags
         self.debugFrame: cv.Mat | None = None
 
     def setFlag(self, index: AbstractFlagIndex, val: typing.Any):
@@ -23,6 +26,13 @@ class FramePoint:
         for k, v in map.items():
             self.flags[k] = v
 
+    def hasSameFlags(self, other: FramePoint) -> bool:
+        # compares all flags but the debug flag, flags can be arrays
+        for lhs, rhs in zip(self.flags[1:], other.flags[1:]):
+            if not np.array_equal(lhs, rhs):
+                return False
+        return True
+
     def setDebugFlag(self, *val: typing.Any):
         self.flags[self.flagIndexType.Debug] = val
 
@@ -48,21 +58,68 @@ class FramePoint:
         return "frame {} {} {}".format(self.index, formatTimestamp(self.timestamp), self.flags)
 
 class FPIR: # Frame Point Intermediate Representation
-    def __init__(self, flagIndexType: typing.Type[AbstractFlagIndex]):
+    def __init__(self, flagIndexType: typing.Type[AbstractFlagIndex], capacity: int = 1024):
         self.flagIndexType: typing.Type[AbstractFlagIndex] = flagIndexType
-        self.framePoints: typing.List[FramePoint] = []
+        # frame points are stored column by column, only the first length rows are valid
+        # FramePoint objects are views built on demand, see getFramePoints
+        self.length: int = 0
+        self.indices: np.ndarray = np.empty(capacity, dtype=np.int64)
+        self.timestamps: np.ndarray = np.empty(capacity, dtype=np.int64)
+        self.flags: np.ndarray = np.empty((capacity, self.flagIndexType.getNum() + 1), dtype=object)
+        self.framePoints: typing.List[FramePoint] | None = None
+
+    def reserve(self, capacity: int):
+        if capacity <= len(self.indices):
+            return
+        self.indices = np.resize(self.indices, capacity)
+        self.timestamps = np.resize(self.timestamps, capacity)
+        flags = np.empty((capacity, self.flags.shape[1]), dtype=object)
+        flags[:self.length] = self.flags[:self.length]
+        self.flags = flags
+        self.framePoints = None # views into the old arrays are stale
+
+    def trim(self):
+        # releases capacity beyond length, e.g. when reserved from an estimated frame count
+        self.indices = self.indices[:self.length].copy()
+        self.timestamps = self.timestamps[:self.length].copy()
+        self.flags = self.flags[:self.length].copy()
+        self.framePoints = None
+
+    def appendFramePoint(self, framePoint: FramePoint):
+        if self.length == len(self.indices):
+            self.reserve(max(1, 2 * self.length))
+        self.indices[self.length] = framePoint.index
+        self.timestamps[self.length] = framePoint.timestamp
+        row = self.flags[self.length]
+        for i, val in enumerate(framePoint.flags): # element-wise, since flags may themselves be arrays
+            row[i] = val
+        self.length += 1
+        self.framePoints = None
+
+    def getFramePoint(self, id: int) -> FramePoint:
+        return FramePoint(self.flagIndexType, int(self.indices[id]), int(self.timestamps[id]), self.flags[id])
+
+    def getFramePoints(self) -> typing.List[FramePoint]:
+        # views write through to the FPIR, and are reused until the FPIR changes size
+        if self.framePoints is None:
+            self.framePoints = [self.getFramePoint(id) for id in range(self.length)]
+        return self.framePoints
+
+    def getFlagArray(self, flag: AbstractFlagIndex, dtype: typing.Any = None) -> np.ndarray:
+        # returns the values of one flag over all frame points
+        return np.array(self.flags[:self.length, flag], dtype=dtype)
 
     def genVirtualEnd(self) -> FramePoint:
-        index: int = len(self.framePoints)
-        timestamp: int = self.framePoints[-1].timestamp
+        index: int = self.length
+        timestamp: int = int(self.timestamps[self.length - 1])
         return FramePoint(self.flagIndexType, index, timestamp)
 
     def getFramePointsWithVirtualEnd(self, length: int = 1) -> typing.List[FramePoint]:
-        return self.framePoints + [self.genVirtualEnd()] * length
+        return self.getFramePoints() + [self.genVirtualEnd()] * length
     
     def toStringFull(self) -> str:
         lines = []
-        for framePoint in self.framePoints:
+        for framePoint in self.getFramePoints():
             lines.append(framePoint.toStringFull() + "\n")
         return "".join(lines)
 
@@ -79,24 +136,18 @@ class FPIRPassBooleanRemoveNoise(FPIRPass):
         self.minLength: int = minLength
 
     def apply(self, fpir: FPIR):
-        for id, framePoint in enumerate(fpir.framePoints):
-            if framePoint.getFlag(self.flag) != self.trueToFalse:
-                continue
-            l = id - self.minLength
-            r = id + self.minLength
-            if l < 0 or r > len(fpir.framePoints) - 1:
-                continue
-            length = 1
-            for i in range(id - 1, l - 1, -1):
-                if fpir.framePoints[i].getFlag(self.flag) != framePoint.getFlag(self.flag):
-                    break
-                length += 1
-            for i in range(id + 1, r + 1):
-                if fpir.framePoints[i].getFlag(self.flag) != framePoint.getFlag(self.flag):
-                    break
-                length += 1
-            if length < self.minLength: # flip
-                framePoint.setFlag(self.flag, not framePoint.getFlag(self.flag))
+        # a frame of value trueToFalse is flipped if the run it belongs to, counted within minLength frames on both sides,
+        # is shorter than minLength, which happens exactly when the whole run is shorter than minLength
+        # frames closer than minLength to either end are kept as they are
+        values = fpir.getFlagArray(self.flag, bool)
+        if len(values) == 0:
+            return
+        changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+        runBegins = np.concatenate(([0], changes))
+        runEnds = np.concatenate((changes, [len(values)]))
+        isNoise = (values[runBegins] == self.trueToFalse) & (runEnds - runBegins < self.minLength)
+        for runBegin, runEnd in zip(runBegins[isNoise], runEnds[isNoise]):
+            fpir.flags[max(runBegin, self.minLength) : min(runEnd, len(values) - self.minLength), self.flag] = not self.trueToFalse
 
 class FPIRPassDetectFeatureJump(FPIRPass):
     def __init__(self, featFlag: AbstractFlagIndex, dstFlag: AbstractFlagIndex, \
@@ -113,7 +164,7 @@ class FPIRPassDetectFeatureJump(FPIRPass):
 
     def apply(self, fpir: FPIR):
         framePointsExt = fpir.getFramePointsWithVirtualEnd(self.windowSize)
-        for id, framePoint in enumerate(fpir.framePoints):
+        for id, framePoint in enumerate(fpir.getFramePoints()):
             featsToBeMeant = []
             for i in range(id + 1, id + 1 + self.windowSize):
                 featsToBeMeant.append(framePointsExt[i].getFlag(self.featFlag))
@@ -138,7 +189,7 @@ class FPIRPassFramewiseFunctional(FPIRPass):
         self.func = func
 
     def apply(self, fpir: FPIR):
-        for id, framePoint in enumerate(fpir.framePoints):
+        for id, framePoint in enumerate(fpir.getFramePoints()):
             self.func(framePoint)
 
 class FPIRPassBuildIntervals(FPIRPass):
@@ -151,19 +202,26 @@ class FPIRPassBooleanBuildIntervals(FPIRPassBuildIntervals):
         self.flags: typing.Tuple[AbstractFlagIndex, ...] = flags
 
     def apply(self, fpir: FPIR) -> typing.List[Interval]:
+        # runs of each flag start at rising edges and end at falling edges of its column
+        # the virtual end carries default flags and closes runs still open at the end
+        # all flags are converted and scanned together, one row per flag
+        defaultFlags: typing.List[typing.Any] = fpir.flagIndexType.getDefaultFlags()
+        values = np.zeros((len(self.flags), fpir.length + 2), dtype=bool)
+        values[:, 1:-1] = np.array(fpir.flags[:fpir.length, list(self.flags)], dtype=bool).T
+        values[:, -1] = [bool(defaultFlags[flag]) for flag in self.flags]
+        edges = np.diff(values.view(np.int8), axis=1)
+        flagId, end = np.nonzero(edges == -1)
+        beginFlagId, begin = np.nonzero(edges == 1)
+        # a run still open at the virtual end has no falling edge, so drop its rising edge
+        rank = np.arange(len(beginFlagId)) - np.searchsorted(beginFlagId, beginFlagId)
+        begin = begin[rank < np.bincount(flagId, minlength=len(self.flags))[beginFlagId]]
+
+        # keeps the order of a frame by frame scan, in which an interval is emitted when it ends
+        framePoints: typing.List[FramePoint] = fpir.getFramePoints()
         intervals: typing.List[Interval] = []
-        lastBegin: typing.List[int] = [0] * len(self.flags)
-        state: typing.List[bool] = [False] * len(self.flags)
-        for framePoint in fpir.getFramePointsWithVirtualEnd():
-            for s in range(len(state)):
-                if not state[s]: # off -> on
-                    if framePoint.getFlag(self.flags[s]):
-                        state[s] = True
-                        lastBegin[s] = framePoint.index
-                else: # on - > off
-                    if not framePoint.getFlag(self.flags[s]):
-                        state[s] = False
-                        intervals.append(Interval(fpir.flagIndexType, self.flags[s], fpir.framePoints[lastBegin[s]].timestamp, framePoint.timestamp, fpir.framePoints[lastBegin[s] : framePoint.index]))
+        for i in np.lexsort((flagId, end)):
+            b, e = int(begin[i]), int(end[i])
+            intervals.append(Interval(fpir.flagIndexType, self.flags[flagId[i]], int(fpir.timestamps[b]), int(fpir.timestamps[min(e, fpir.length - 1)]), framePoints[b : e]))
         return intervals
 
 class Interval:
@@ -198,10 +256,32 @@ class Interval:
         return self.dist(other) == 0
 
 class IIR: # Interval Intermediate Representation
+    # timing of intervals as seen by vectorized passes, see getIntervalArray
+    IntervalDtype: np.dtype = np.dtype([("begin", np.float64), ("end", np.float64), ("mainFlag", np.int64)])
+
     def __init__(self, flagIndexType: typing.Type[AbstractFlagIndex]):
         self.flagIndexType: typing.Type[AbstractFlagIndex] = flagIndexType
         self.intervals: typing.List[Interval] = []
 
+    def getIntervalArray(self) -> np.ndarray:
+        # returns begin, end and mainFlag of each interval, in order, as a structured array
+        # changes to the array only take effect through setIntervalTimes
+        array = np.empty(len(self.intervals), dtype=IIR.IntervalDtype)
+        array["begin"] = [interval.begin for interval in self.intervals]
+        array["end"] = [interval.end for interval in self.intervals]
+        array["mainFlag"] = [interval.mainFlag for interval in self.intervals]
+        return array
+
+    def setIntervalTimes(self, array: np.ndarray, ids: np.ndarray | None = None, asInt: bool = False):
+        # array holds either all intervals in order, or only the intervals at ids, which are the only ones written
+        # asInt keeps times as integer millisecs, like intervals built from frame points
+        intervals = self.intervals if ids is None else [self.intervals[id] for id in ids.tolist()]
+        begins = array["begin"].astype(np.int64) if asInt else array["begin"]
+        ends = array["end"].astype(np.int64) if asInt else array["end"]
+        for interval, begin, end in zip(intervals, begins.tolist(), ends.tolist()):
+            interval.begin = begin
+            interval.end = end
+
     def appendFromFpir(self, fpir: FPIR, fpirPassBuildIntervals: FPIRPassBuildIntervals):
         # does not guarantee that intervals are in order after appending
         self.intervals += fpirPassBuildIntervals.apply(fpir)
@@ -231,24 +311,24 @@ class IIRPassFillGap(IIRPass):
         self.meetPoint: float = meetPoint
     
     def apply(self, iir: IIR):
-        for id, interval in enumerate(iir.intervals):
-            if interval.mainFlag != self.flag:
-                continue
+        # intervals of other flags never take part, so leave them out of the scan
+        # intervals of one flag do not overlap, so the next one is usually the only one looked at
+        intervals: typing.List[Interval] = [interval for interval in iir.intervals if interval.mainFlag == self.flag]
+        for id, interval in enumerate(intervals):
             otherId = id + 1
-            while otherId < len(iir.intervals):
-                otherInterval = iir.intervals[otherId]
-                if otherInterval.mainFlag != self.flag:
-                    otherId += 1
-                    continue
-                if interval.dist(otherInterval) > self.maxGap:
+            while otherId < len(intervals):
+                otherInterval = intervals[otherId]
+                dist = interval.dist(otherInterval)
+                if dist > self.maxGap:
                     break
-                if interval.dist(otherInterval) <= 0:
+                if dist <= 0:
                     otherId += 1
                     continue
                 mid = int(interval.end * (1.0 - self.meetPoint) + otherInterval.begin * self.meetPoint)
                 interval.end = mid
                 otherInterval.begin = mid
                 break
+        # moved begins can pass those of other flags
         iir.sort()
 
 class IIRPassAlign(IIRPass):
@@ -258,45 +338,22 @@ class IIRPassAlign(IIRPass):
         self.maxGap: int = maxGap # in millisecs
     
     def apply(self, iir: IIR):
-        refPoints: typing.List[int] = []
-        for _, interval in enumerate(iir.intervals):
-            if interval.mainFlag != self.refFlag:
-                continue
-            refPoints.append(interval.begin)
-            refPoints.append(interval.end)
-        refPoints.sort()
+        array = iir.getIntervalArray()
+        refIntervals = array[array["mainFlag"] == self.refFlag]
+        refPoints = np.sort(np.concatenate((refIntervals["begin"], refIntervals["end"])))
         if len(refPoints) == 0:
             return
 
-        for _, interval in enumerate(iir.intervals):
-            if interval.mainFlag != self.tgtFlag:
-                continue
-            
-            r = 0
-            while r < len(refPoints) and refPoints[r] < interval.begin:
-                r = r + 1
-            l = max(0, r - 1)
-            r = min(r, len(refPoints) - 1)
-            lDist = refPoints[l] - interval.begin # <= 0
-            rDist = refPoints[r] - interval.begin # >= 0
-            dist = lDist
-            if rDist < -lDist:
-                dist = rDist
-            if abs(dist) <= self.maxGap:
-                interval.begin += dist
-            
-            r = 0
-            while r < len(refPoints) and refPoints[r] < interval.end:
-                r = r + 1
-            l = max(0, r - 1)
-            r = min(r, len(refPoints) - 1)
-            lDist = refPoints[l] - interval.end # <= 0
-            rDist = refPoints[r] - interval.end # >= 0
-            dist = lDist
-            if rDist < -lDist:
-                dist = rDist
-            if abs(dist) <= self.maxGap:
-                interval.end += dist
+        tgtIds = np.flatnonzero(array["mainFlag"] == self.tgtFlag)
+        tgtIntervals = array[tgtIds]
+        for field in ("begin", "end"):
+            points = tgtIntervals[field]
+            r = np.searchsorted(refPoints, points) # first ref point not before each point
+            lDist = refPoints[np.maximum(r - 1, 0)] - points # <= 0
+            rDist = refPoints[np.minimum(r, len(refPoints) - 1)] - points # >= 0
+            dist = np.where(rDist < -lDist, rDist, lDist)
+            tgtIntervals[field] = points + np.where(np.abs(dist) <= self.maxGap, dist, 0)
+        iir.setIntervalTimes(tgtIntervals, tgtIds, asInt=True)
             
         iir.sort()
 
@@ -6,6 +6,8 @@ import json
 import jsonschema
 import yaml
 import time
+import threading
+import queue
 
 from Rectangle import *
 from IR import *
@@ -49,8 +51,12 @@ def main():
         print("Task {}: {} -> {}".format(nTask, src, dst))
 
         srcMp4 = cv.VideoCapture(src)
-        srcRect = SrcRectangle(srcMp4)
+        roiScale: float = config.get("roiScale", 1.0)
+        srcRect = SrcRectangle(srcMp4, roiScale)
         fps: float = srcMp4.get(cv.CAP_PROP_FPS)
+        if not fps > 0:
+            raise Exception("Invalid frame rate {} of source \"{}\"".format(fps, src))
+        msPerFrame: float = 1000.0 / fps
         frameCount: float = srcMp4.get(cv.CAP_PROP_FRAME_COUNT)
         size: typing.Tuple[int, int] = srcRect.getSizeInt()
 
@@ -68,7 +74,7 @@ def main():
         strategy: AbstractStrategy | None = None
         print(config["strategy"])
         if config["strategy"] == "mr":
-            strategy = MagirecoStrategy(strategyConfig, contentRect)
+            strategy = MagirecoStrategy(strategyConfig, contentRect, config["mode"] == "debug", roiScale)
         elif config["strategy"] == "mr-s0":
             strategy = MagirecoScene0Strategy(strategyConfig, contentRect)
         elif config["strategy"] == "lcb":
@@ -81,54 +87,127 @@ def main():
             strategy = ParakoStrategy(strategyConfig, contentRect)
         else:
             raise Exception("Unknown strategy! ")
+        if roiScale != 1.0 and not strategy.supportsRoiScale():
+            raise Exception("Strategy \"" + config["strategy"] + "\" does not support roiScale other than 1.0")
         flagIndexType = strategy.getFlagIndexType()
 
         print("==== FPIR Building ====")
-        fpir = FPIR(flagIndexType)
-        while True: # Process each frame to build FPIR
-
-            # Frame reading
-
-            frameIndex: int = int(srcMp4.get(cv.CAP_PROP_POS_FRAMES))
-            timestamp: int = int(srcMp4.get(cv.CAP_PROP_POS_MSEC))
-            validFrame, frame = srcMp4.read()
-            if not validFrame:
-                break
-
-            # CV and frame point building
-
+        # the frame count reported by the container is an estimate, the FPIR still grows if it is exceeded
+        fpir = FPIR(flagIndexType, max(int(frameCount), 1))
+
+        # Frames are decoded in the background so that decoding overlaps with CV
+        # The queue is bounded to keep only a few decoded frames in memory
+        frameQueue: queue.Queue[typing.Tuple[int, int, cv.Mat] | None] = queue.Queue(maxsize=8)
+        stopDecoding = threading.Event()
+        decoderErrors: typing.List[BaseException] = [] # raised again by the main thread once it reaches the end of the queue
+        def decodeFrames():
+            try:
+                # frames are counted locally instead of querying the backend position before every read
+                # the position queried before a read reports the timestamp of the previous frame, 
+                # which the default offset compensates for, so timestamps lag one frame in the same way
+                frameIndex: int = 0
+                while not stopDecoding.is_set():
+                    timestamp: int = int(max(frameIndex - 1, 0) * msPerFrame)
+                    validFrame, frame = srcMp4.read()
+                    if not validFrame:
+                        break
+                    if roiScale != 1.0: # scaled once here so that every ROI and pass works on fewer pixels
+                        frame = cv.resize(frame, size, interpolation=cv.INTER_AREA)
+                    frameQueue.put((frameIndex, timestamp, frame))
+                    frameIndex += 1
+            except BaseException as e:
+                decoderErrors.append(e)
+            finally:
+                frameQueue.put(None) # the end is always signalled, otherwise the main thread waits forever
+        decoder = threading.Thread(target=decodeFrames, daemon=True)
+        decoder.start()
+
+        def analyseFrame(frameIndex: int, timestamp: int, frame: cv.Mat) -> FramePoint:
             framePoint = FramePoint(flagIndexType, frameIndex, timestamp)
             for cvPass in strategy.getCvPasses():
                 mayShortcircuit = cvPass(frame, framePoint)
                 if mayShortcircuit and config["mode"] == "shortcircuit":
                     break
-            fpir.framePoints.append(framePoint)
-
-            # Outputs
-
-            if frameIndex % 1000 == 0:
-                print(framePoint.toString())
-
-            if config["mode"] == "debug":
-                frameOut = frame
-                frameOut = contentRect.draw(frameOut)
-                for name, rect in strategy.getRectangles().items():
-                    frameOut = rect.draw(frameOut)
-                height = 50
-                for name, index in flagIndexType.__members__.items():
-                    value = framePoint.getFlag(index)
-                    frameOut = cv.putText(frameOut, name + ": " + str(value), (50, height), cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 3)
-                    frameOut = cv.putText(frameOut, name + ": " + str(value), (50, height), cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                    height += 20
-                print("debug frame", frameIndex, formatTimestamp(timestamp), framePoint.getDebugFlag())
-                debugMp4.write(frameOut)
-                if framePoint.getDebugFrame() is not None:
-                    frameOut = framePoint.getDebugFrame()
-                if cv.waitKey(1) == ord('q'):
+            return framePoint
+
+        progressMask: int = 1023 # progress is printed every 1024 frames, a power of two so that the check is a mask
+        def appendFramePoint(framePoint: FramePoint):
+            fpir.appendFramePoint(framePoint)
+            if (framePoint.index & progressMask) == 0:
+                print("frame", framePoint.index, formatTimestamp(framePoint.timestamp))
+
+        # Adaptive sampling skips CV on up to stride - 1 frames while flags stay the same
+        # Skipped frames are kept until the next analysed frame tells whether anything changed in between
+        adaptiveSampling: bool = config.get("adaptiveSampling", False) and config["mode"] != "debug"
+        skippedFrames: typing.List[typing.Tuple[int, int, cv.Mat]] = []
+        lastFramePoint: FramePoint | None = None
+        stableCount: int = 0
+        stride: int = 1
+
+        try:
+            while True: # Process each frame to build FPIR
+
+                # Frame reading
+
+                decodedFrame = frameQueue.get()
+                if decodedFrame is None:
+                    if decoderErrors:
+                        raise decoderErrors[0]
+                    for skippedFrame in skippedFrames: # nothing left to compare with
+                        appendFramePoint(analyseFrame(*skippedFrame))
                     break
-                cv.imshow("show", frameOut)
-            framePoint.clearDebugFrame()
+                if adaptiveSampling and len(skippedFrames) < stride - 1:
+                    skippedFrames.append(decodedFrame)
+                    continue
+                frameIndex, timestamp, frame = decodedFrame
+
+                # CV and frame point building
+
+                framePoint = analyseFrame(frameIndex, timestamp, frame)
+
+                if adaptiveSampling:
+                    isStable = lastFramePoint is not None and framePoint.hasSameFlags(lastFramePoint)
+                    for skippedIndex, skippedTimestamp, skippedFrame in skippedFrames:
+                        if isStable: # nothing changed in between, so skipped frames take the same flags
+                            appendFramePoint(FramePoint(flagIndexType, skippedIndex, skippedTimestamp, list(framePoint.flags)))
+                        else: # something changed in between, so find out exactly where
+                            appendFramePoint(analyseFrame(skippedIndex, skippedTimestamp, skippedFrame))
+                    skippedFrames.clear()
+                    stableCount = stableCount + 1 if isStable else 0
+                    stride = min(8, 1 + stableCount // 5)
+                    lastFramePoint = framePoint
+
+                appendFramePoint(framePoint)
+
+                # Outputs
+
+                if config["mode"] == "debug":
+                    frameOut = frame
+                    frameOut = contentRect.draw(frameOut)
+                    for name, rect in strategy.getRectangles().items():
+                        frameOut = rect.draw(frameOut)
+                    height = 50
+                    for name, index in flagIndexType.__members__.items():
+                        value = framePoint.getFlag(index)
+                        frameOut = cv.putText(frameOut, name + ": " + str(value), (50, height), cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 3)
+                        frameOut = cv.putText(frameOut, name + ": " + str(value), (50, height), cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                        height += 20
+                    print("debug frame", frameIndex, formatTimestamp(timestamp), framePoint.getDebugFlag())
+                    debugMp4.write(frameOut)
+                    if framePoint.getDebugFrame() is not None:
+                        frameOut = framePoint.getDebugFrame()
+                    if cv.waitKey(1) == ord('q'):
+                        break
+                    cv.imshow("show", frameOut)
+                framePoint.clearDebugFrame()
+        finally:
+            stopDecoding.set()
+            while decoder.is_alive(): # unblocks the decoder if the loop was left early
+                while not frameQueue.empty():
+                    frameQueue.get_nowait()
+                decoder.join(0.1)
         srcMp4.release()
+        fpir.trim()
         if config["mode"] == "debug":
             debugMp4.release()
 
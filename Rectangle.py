@@ -3,7 +3,16 @@ import abc
 import typing
 import cv2 as cv
 
+# integer corners (left, right, top, bottom) and the matching (rows, cols) slices
+RoiBounds = typing.Tuple[typing.Tuple[int, int, int, int], typing.Tuple[slice, slice]]
+
 class AbstractRectangle(abc.ABC):
+    def __init__(self) -> None:
+        # bounds are cached per canvas, see getRoiBounds
+        # children are tracked so that a change of this rectangle also invalidates their bounds
+        self.roiBoundsCache: typing.Dict[typing.Optional[AbstractRectangle], RoiBounds] = {}
+        self.children: typing.List[AbstractRectangle] = []
+
     @abc.abstractmethod
     def getParent(self) -> typing.Optional[AbstractRectangle]:
         pass
@@ -15,7 +24,23 @@ class AbstractRectangle(abc.ABC):
 
     def getCornersInt(self, canvasRect: typing.Optional[AbstractRectangle] = None) -> typing.Tuple[int, int, int, int]:
         # returns: left, right, top, bottom
-        return tuple([int(x) for x in self.getCornersFloat(canvasRect)])
+        return self.getRoiBounds(canvasRect)[0]
+
+    def getRoiBounds(self, canvasRect: typing.Optional[AbstractRectangle] = None) -> RoiBounds:
+        # returns: integer corners and the matching (rows, cols) slices, computed once per canvas
+        # ROIs are cut every frame but rectangles rarely move, so the float math is only redone after invalidateRoiBounds
+        bounds = self.roiBoundsCache.get(canvasRect)
+        if bounds is None:
+            l, r, t, b = tuple([int(x) for x in self.getCornersFloat(canvasRect)])
+            bounds = ((l, r, t, b), (slice(t, b), slice(l, r)))
+            self.roiBoundsCache[canvasRect] = bounds
+        return bounds
+
+    def invalidateRoiBounds(self):
+        # bounds of descendants depend on this rectangle, whatever canvas they are relative to
+        self.roiBoundsCache.clear()
+        for child in self.children:
+            child.invalidateRoiBounds()
 
     def getSizeFloat(self, canvasRect: typing.Optional[AbstractRectangle] = None) -> typing.Tuple[float, float]:
         # returns: width, height
@@ -35,11 +60,11 @@ class AbstractRectangle(abc.ABC):
     @typing.overload
     def cutRoi(self, frame: cv.UMat, canvasRect: typing.Optional[AbstractRectangle] = None) -> cv.UMat: ...
     def cutRoi(self, frame: typing.Union[cv.typing.MatLike, cv.UMat], canvasRect: typing.Optional[AbstractRectangle] = None):
-        l, r, t, b = self.getCornersInt(canvasRect)
+        (l, r, t, b), slices = self.getRoiBounds(canvasRect)
         if isinstance(frame, cv.UMat):
             return cv.UMat(frame, (t, b), (l, r))
         else:
-            return frame[t:b, l:r]
+            return frame[slices]
     
     def cutRoiToUmat(self, frame: cv.Mat, canvasRect: typing.Optional[AbstractRectangle] = None) -> cv.UMat:
         return cv.UMat(self.cutRoi(frame, canvasRect))
@@ -54,7 +79,9 @@ class AbstractRectangle(abc.ABC):
 
 class RatioRectangle(AbstractRectangle):
     def __init__(self, parent: AbstractRectangle, leftRatio: float, rightRatio: float, topRatio: float, bottomRatio: float) -> None:
+        super().__init__()
         self.parent: AbstractRectangle = parent
+        self.parent.children.append(self)
         self.updateRatios(leftRatio, rightRatio, topRatio, bottomRatio)
 
     def updateRatios(self, leftRatio: float, rightRatio: float, topRatio: float, bottomRatio: float):
@@ -67,6 +94,8 @@ class RatioRectangle(AbstractRectangle):
         self.rightRatio: float = rightRatio
         self.topRatio: float = topRatio
         self.bottomRatio: float = bottomRatio
+        self.invalidateRoiBounds()
+        self.getRoiBounds()
     
     def getParent(self) -> typing.Optional[AbstractRectangle]:
         return self.parent
@@ -89,9 +118,12 @@ class RatioRectangle(AbstractRectangle):
         return left, right, top, bottom
 
 class SrcRectangle(AbstractRectangle):
-    def __init__(self, src: cv.VideoCapture):
-        self.width: float = float(src.get(cv.CAP_PROP_FRAME_WIDTH))
-        self.height: float = float(src.get(cv.CAP_PROP_FRAME_HEIGHT))
+    def __init__(self, src: cv.VideoCapture, scale: float = 1.0):
+        super().__init__()
+        # frames are resized to this size before they reach any other rectangle
+        self.width: float = float(round(src.get(cv.CAP_PROP_FRAME_WIDTH) * scale))
+        self.height: float = float(round(src.get(cv.CAP_PROP_FRAME_HEIGHT) * scale))
+        self.getRoiBounds()
 
     def getParent(self) -> typing.Optional[AbstractRectangle]:
         return None
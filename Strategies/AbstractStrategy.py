@@ -35,3 +35,9 @@ class AbstractStrategy(abc.ABC):
 
     def getStyles(self) -> typing.List[str]:
         return []
+
+    @classmethod
+    def supportsRoiScale(cls) -> bool:
+        # whether detection still works on frames scaled by roiScale
+        # strategies whose parameters do not depend on pixel sizes, or which scale them, override this
+        return False
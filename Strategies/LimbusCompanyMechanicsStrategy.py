@@ -31,6 +31,8 @@ class LimbusCompanyMechanicsStrategy(AbstractStrategy):
 
         self.dialogRect = self.rectangles["dialogRect"]
 
+        self.dialogTextDilateKernel: cv.Mat = cv.getStructuringElement(cv.MORPH_RECT, (3, 3))
+
         self.cvPasses = [self.cvPassDialog]
 
         self.fpirPasses = collections.OrderedDict()
@@ -84,7 +86,7 @@ class LimbusCompanyMechanicsStrategy(AbstractStrategy):
         roiDialog = self.dialogRect.cutRoi(frame)
         roiDialogGray = cv.cvtColor(roiDialog, cv.COLOR_BGR2GRAY)
         _, roiDialogTextBin = cv.threshold(roiDialogGray, 128, 255, cv.THRESH_BINARY)
-        roiDialogTextBinDialate = cv.morphologyEx(roiDialogTextBin, cv.MORPH_DILATE, kernel=cv.getStructuringElement(cv.MORPH_RECT, (3, 3)))
+        roiDialogTextBinDialate = cv.morphologyEx(roiDialogTextBin, cv.MORPH_DILATE, kernel=self.dialogTextDilateKernel)
         roiDialogGrayNoText = cv.bitwise_and(roiDialogGray, roiDialogGray, mask=255-roiDialogTextBinDialate)
 
         meanDialogGrayNoText = cv.mean(roiDialogGrayNoText)[0]
@@ -104,7 +106,7 @@ class LimbusCompanyMechanicsStrategy(AbstractStrategy):
     class FPIRPassTrainPCA(FPIRPass):
         def apply(self, fpir: FPIR):
             feats: np.ndarray = np.array([])
-            for i, framePoint in enumerate(fpir.framePoints):
+            for i, framePoint in enumerate(fpir.getFramePoints()):
                 feat: np.ndarray = framePoint.getFlag(LimbusCompanyMechanicsStrategy.FlagIndex.DialogTextFrame)
                 if i % 50 != 0: # sample only a few frames because one single subtitle lasts for seconds
                     continue
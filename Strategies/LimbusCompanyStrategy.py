@@ -27,6 +27,9 @@ class LimbusCompanyStrategy(AbstractStrategy):
 
         self.dialogRect = self.rectangles["dialogRect"]
 
+        self.dialogBgOpenKernel: cv.Mat = cv.getStructuringElement(cv.MORPH_RECT, (31, 1))
+        self.dialogTextTophatKernel: cv.Mat = cv.getStructuringElement(cv.MORPH_ELLIPSE, (5, 5))
+
         self.cvPasses = [self.cvPassDialog]
 
         self.fpirPasses = collections.OrderedDict()
@@ -64,7 +67,7 @@ class LimbusCompanyStrategy(AbstractStrategy):
         roiDialogGray = cv.cvtColor(roiDialog, cv.COLOR_BGR2GRAY)
 
         roiDialogBgBin = cv.adaptiveThreshold(roiDialogGray, 255, cv.ADAPTIVE_THRESH_MEAN_C, cv.THRESH_BINARY, 9, 0)
-        roiDialogBgBinOpen = cv.morphologyEx(roiDialogBgBin, cv.MORPH_OPEN, kernel=cv.getStructuringElement(cv.MORPH_RECT, (31, 1)))
+        roiDialogBgBinOpen = cv.morphologyEx(roiDialogBgBin, cv.MORPH_OPEN, kernel=self.dialogBgOpenKernel)
 
         meanDialogBgBinOpen: float = cv.mean(roiDialogBgBinOpen)[0]
         dialogBgVal: float = meanDialogBgBinOpen / self.dialogRect.getArea()
@@ -75,7 +78,7 @@ class LimbusCompanyStrategy(AbstractStrategy):
 
 
         _, roiDialogTextBin = cv.threshold(roiDialogGray, 128, 255, cv.THRESH_BINARY)
-        roiDialogTextBinTophat = cv.morphologyEx(roiDialogTextBin, cv.MORPH_TOPHAT, kernel=cv.getStructuringElement(cv.MORPH_ELLIPSE, (5, 5)))
+        roiDialogTextBinTophat = cv.morphologyEx(roiDialogTextBin, cv.MORPH_TOPHAT, kernel=self.dialogTextTophatKernel)
 
         meanDialogTextBinTophat: float = cv.mean(roiDialogTextBinTophat)[0]
         dialogTextVal: float = meanDialogTextBinTophat / self.dialogRect.getArea()
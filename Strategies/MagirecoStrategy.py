@@ -32,11 +32,13 @@ class MagirecoStrategy(AbstractStrategy):
         def getDefaultFlagsImpl(cls) -> typing.List[typing.Any]:
             return [False] * cls.getNum()
 
-    def __init__(self, config: dict, contentRect: AbstractRectangle) -> None:
+    def __init__(self, config: dict, contentRect: AbstractRectangle, debug: bool = False, roiScale: float = 1.0) -> None:
         self.rectangles: collections.OrderedDict[str, AbstractRectangle] = collections.OrderedDict()
         for k, v in config.items():
             self.rectangles[k] = RatioRectangle(contentRect, *v)
 
+        self.contentRect = contentRect
+        self.debug: bool = debug
         self.dialogOutlineRect = self.rectangles["dialogOutlineRect"]
         self.dialogBgRect = self.rectangles["dialogBgRect"]
         self.blackscreenRect = self.rectangles["blackscreenRect"]
@@ -46,7 +48,18 @@ class MagirecoStrategy(AbstractStrategy):
         self.cgSubBelowRect = self.rectangles["cgSubBelowRect"]
         self.cgSubTextRect = self.rectangles["cgSubTextRect"]
 
-        self.cvPasses = [self.cvPassDialog, self.cvPassBlackscreen, self.cvPassWhitescreen, self.cvPassCgSub]
+        # the border must span 20 pixels at source resolution, the Sobel threshold and row average do not depend on pixel size
+        self.cgSubBorderErodeKernel: cv.Mat = cv.getStructuringElement(cv.MORPH_RECT, (max(1, round(20 * roiScale)), 1))
+        self.dialogBgDiffLUT: np.ndarray = self.buildDialogBgDiffLUT(160, 32)
+        self.dialogOutlineLowerHSV: np.ndarray = np.array([10, 40, 90], dtype=np.uint8)
+        self.dialogOutlineUpperHSV: np.ndarray = np.array([30, 130, 190], dtype=np.uint8)
+
+        # content of the current frame and its gray plane shared by all ROIs, see cvPassColourConvert
+        self.content: cv.UMat | None = None
+        self.contentGray: cv.UMat | None = None
+        self.contentBrightBin: cv.UMat | None = None
+
+        self.cvPasses = [self.cvPassColourConvert, self.cvPassDialog, self.cvPassBlackscreen, self.cvPassWhitescreen, self.cvPassCgSub]
 
         self.fpirPasses = collections.OrderedDict()
         self.fpirPasses["fpirPassRemoveNoiseDialogFalse"] = FPIRPassBooleanRemoveNoise(MagirecoStrategy.FlagIndex.Dialog, False, 2)
@@ -72,6 +85,22 @@ class MagirecoStrategy(AbstractStrategy):
         self.iirPasses["iirPassFillGapWhitescreen"] = IIRPassFillGap(MagirecoStrategy.FlagIndex.Whitescreen, 1200)
         self.iirPasses["iirPassFillGapCgSub"] = IIRPassFillGap(MagirecoStrategy.FlagIndex.CgSub, 1200)
 
+    @staticmethod
+    def buildDialogBgDiffLUT(minV: int, maxS: int) -> np.ndarray:
+        # dialog background is any hue with V >= minV and S <= maxS, where V = max(B, G, R) and S depends only on V and max - min
+        # so for each V tabulate how many values of max - min give S <= maxS, which is 0 for V < minV
+        # S is taken from OpenCV's own conversion to keep its rounding
+        lut = np.zeros(256, dtype=np.uint8)
+        for v in range(minV, 256):
+            diffs = np.arange(v + 1, dtype=np.uint8)
+            pixels = np.stack([np.full_like(diffs, v), v - diffs, v - diffs], axis=-1)[np.newaxis]
+            lut[v] = np.count_nonzero(cv.cvtColor(pixels, cv.COLOR_BGR2HSV)[0, :, 1] <= maxS)
+        return lut
+
+    @classmethod
+    def supportsRoiScale(cls) -> bool:
+        return True
+
     @classmethod
     def getFlagIndexType(cls) -> typing.Type[AbstractFlagIndex]:
         return cls.FlagIndex
@@ -91,20 +120,41 @@ class MagirecoStrategy(AbstractStrategy):
     def getIirPasses(self) -> collections.OrderedDict[str, IIRPass]:
         return self.iirPasses
 
+    def cvPassColourConvert(self, frame: cv.Mat, framePoint: FramePoint) -> bool:
+        # the content is uploaded once, and ROIs are cut from it as UMat headers without copying
+        # so that with OpenCL enabled only scalar results are downloaded from the device
+        # ROIs overlap heavily, so also convert the content once and cut gray ROIs from it
+        # HSV is only needed by the dialog outline ROI and is still converted there
+        self.content = self.contentRect.cutRoiToUmat(frame)
+        self.contentGray = cv.cvtColor(self.content, cv.COLOR_BGR2GRAY)
+        self.contentBrightBin = None
+        return False
+
+    def getContentBrightBin(self) -> cv.UMat:
+        # blackscreen text, whitescreen background and cgSub text all binarise gray at 160 over overlapping ROIs
+        # so threshold the content once on first use and take ROI means from it
+        # built lazily so that frames short-circuited by the dialog pass never pay for it
+        if self.contentBrightBin is None:
+            _, self.contentBrightBin = cv.threshold(self.contentGray, 160, 255, cv.THRESH_BINARY)
+        return self.contentBrightBin
+
     def cvPassDialog(self, frame: cv.Mat, framePoint: FramePoint) -> bool:
-        roiDialogBg = self.dialogBgRect.cutRoiToUmat(frame)
-        roiDialogBgGray = cv.cvtColor(roiDialogBg, cv.COLOR_BGR2GRAY)
-        roiDialogBgHSV = cv.cvtColor(roiDialogBg, cv.COLOR_BGR2HSV)
-        roiDialogBgBin = inRange(roiDialogBgHSV, [0, 0, 160], [255, 32, 255])
+        roiDialogBg = self.dialogBgRect.cutRoi(self.content, self.contentRect)
+        roiDialogBgGray = self.dialogBgRect.cutRoi(self.contentGray, self.contentRect)
+        # same as inRange of HSV in [0, 0, 160] to [255, 32, 255], but without the conversion, see buildDialogBgDiffLUT
+        roiDialogBgB, roiDialogBgG, roiDialogBgR = cv.split(roiDialogBg)
+        roiDialogBgMax = cv.max(cv.max(roiDialogBgB, roiDialogBgG), roiDialogBgR)
+        roiDialogBgMin = cv.min(cv.min(roiDialogBgB, roiDialogBgG), roiDialogBgR)
+        roiDialogBgBin = cv.compare(cv.subtract(roiDialogBgMax, roiDialogBgMin), cv.LUT(roiDialogBgMax, self.dialogBgDiffLUT), cv.CMP_LT)
         _, roiDialogBgTextBin = cv.threshold(roiDialogBgGray, 192, 255, cv.THRESH_BINARY)
         meanDialogTextBin: float = cv.mean(roiDialogBgTextBin)[0]
         meanDialogBgBin: float = cv.mean(roiDialogBgBin)[0]
         hasDialogBg: bool = meanDialogBgBin > 160
         hasDialogText: bool = meanDialogTextBin < 254 and meanDialogTextBin > 192
 
-        roiDialogOutline = self.dialogOutlineRect.cutRoiToUmat(frame)
+        roiDialogOutline = self.dialogOutlineRect.cutRoi(self.content, self.contentRect)
         roiDialogOutlineHSV = cv.cvtColor(roiDialogOutline, cv.COLOR_BGR2HSV)
-        roiDialogOutlineBin = inRange(roiDialogOutlineHSV, [10, 40, 90], [30, 130, 190])
+        roiDialogOutlineBin = cv.inRange(roiDialogOutlineHSV, self.dialogOutlineLowerHSV, self.dialogOutlineUpperHSV)
         meanDialogOutlineBin: float = cv.mean(roiDialogOutlineBin)[0]
         hasDialogOutline: bool = meanDialogOutlineBin > 3
 
@@ -117,10 +167,9 @@ class MagirecoStrategy(AbstractStrategy):
         return isValidDialog
 
     def cvPassBlackscreen(self, frame: cv.Mat, framePoint: FramePoint) -> bool:
-        roiBlackscreen = self.blackscreenRect.cutRoiToUmat(frame)
-        roiBlackscreenGray = cv.cvtColor(roiBlackscreen, cv.COLOR_BGR2GRAY)
+        roiBlackscreenGray = self.blackscreenRect.cutRoi(self.contentGray, self.contentRect)
         _, roiBlackscreenBgBin = cv.threshold(roiBlackscreenGray, 80, 255, cv.THRESH_BINARY)
-        _, roiBlackscreenTextBin = cv.threshold(roiBlackscreenGray, 160, 255, cv.THRESH_BINARY)
+        roiBlackscreenTextBin = self.blackscreenRect.cutRoi(self.getContentBrightBin(), self.contentRect)
         meanBlackscreenBgBin: float = cv.mean(roiBlackscreenBgBin)[0]
         meanBlackscreenTextBin: float = cv.mean(roiBlackscreenTextBin)[0]
         hasBlackscreenBg: bool = meanBlackscreenBgBin < 20
@@ -134,12 +183,9 @@ class MagirecoStrategy(AbstractStrategy):
         return isValidBlackscreen
 
     def cvPassWhitescreen(self, frame: cv.Mat, framePoint: FramePoint) -> bool:
-        roiWhitescreen = self.whitescreenRect.cutRoiToUmat(frame)
-        roiWhitescreenGray = cv.cvtColor(roiWhitescreen, cv.COLOR_BGR2GRAY)
-        _, roiWhitescreenBgBin = cv.threshold(roiWhitescreenGray, 160, 255, cv.THRESH_BINARY)
-        _, roiWhitescreenTextBin = cv.threshold(roiWhitescreenGray, 160, 255, cv.THRESH_BINARY_INV)
+        roiWhitescreenBgBin = self.whitescreenRect.cutRoi(self.getContentBrightBin(), self.contentRect)
         meanWhitescreenBgBin: float = cv.mean(roiWhitescreenBgBin)[0]
-        meanWhitescreenTextBin: float = cv.mean(roiWhitescreenTextBin)[0]
+        meanWhitescreenTextBin: float = 255 - meanWhitescreenBgBin # text is the inverse of background at the same threshold
         hasWhitescreenBg: bool = meanWhitescreenBgBin > 230
         hasWhitescreenText: bool = meanWhitescreenTextBin > 0.8 and meanWhitescreenTextBin < 16
 
@@ -151,32 +197,31 @@ class MagirecoStrategy(AbstractStrategy):
         return isValidWhitescreen
 
     def cvPassCgSub(self, frame: cv.Mat, framePoint: FramePoint) -> bool:
-        roiCgSubAbove = self.cgSubAboveRect.cutRoiToUmat(frame)
-        roiCgSubAboveGray = cv.cvtColor(roiCgSubAbove, cv.COLOR_BGR2GRAY)
+        roiCgSubAboveGray = self.cgSubAboveRect.cutRoi(self.contentGray, self.contentRect)
         meanCgSubAboveGray = cv.mean(roiCgSubAboveGray)[0]
-        roiCgSubBelow = self.cgSubBelowRect.cutRoiToUmat(frame)
-        roiCgSubBelowGray = cv.cvtColor(roiCgSubBelow, cv.COLOR_BGR2GRAY)
+        roiCgSubBelowGray = self.cgSubBelowRect.cutRoi(self.contentGray, self.contentRect)
         _, roiCgSubBelowGrayNoText = cv.threshold(roiCgSubBelowGray, 160, 255, cv.THRESH_TOZERO_INV)
         meanCgSubBelowGrayNoText: float = cv.mean(roiCgSubBelowGrayNoText)[0]
         cgSubBrightnessDecrVal: float = meanCgSubAboveGray - meanCgSubBelowGrayNoText
         cgSubBrightnessDecrRate: float = 1 - meanCgSubBelowGrayNoText / max(meanCgSubAboveGray, 1.0)
         hasCgSubContrast: bool = cgSubBrightnessDecrVal > 15.0 and cgSubBrightnessDecrRate > 0.30
 
-        roiCgSubBorder = self.cgSubBorderRect.cutRoiToUmat(frame)
-        roiCgSubBorderGray = cv.cvtColor(roiCgSubBorder, cv.COLOR_BGR2GRAY)
-        roiCgSubBorderEdge = cv.convertScaleAbs(cv.Sobel(roiCgSubBorderGray, cv.CV_16S, 0, 1, ksize=3))
-        _, roiCgSubBorderEdgeBin = cv.threshold(roiCgSubBorderEdge, 5, 255, cv.THRESH_BINARY)
-        roiCgSubBorderBinErode = cv.morphologyEx(roiCgSubBorderEdgeBin, cv.MORPH_ERODE, kernel=cv.getStructuringElement(cv.MORPH_RECT, (20, 1)))
-        roiCgSubBorderRowReduce = cv.reduce(roiCgSubBorderBinErode, 1, cv.REDUCE_AVG, dtype=cv.CV_32F)
-        maxCgSubBorderRowReduce: float = cv.minMaxLoc(roiCgSubBorderRowReduce)[1]
-        hasCgSubBorder: bool = maxCgSubBorderRowReduce > 200.0
-
-        roiCgSubText = self.cgSubTextRect.cutRoiToUmat(frame)
-        roiCgSubTextGray = cv.cvtColor(roiCgSubText, cv.COLOR_BGR2GRAY)
-        _, roiCgSubTextBin = cv.threshold(roiCgSubTextGray, 160, 255, cv.THRESH_BINARY)
+        roiCgSubTextBin = self.cgSubTextRect.cutRoi(self.getContentBrightBin(), self.contentRect)
         meanCgSubTextBin: float = cv.mean(roiCgSubTextBin)[0]
         hasCgSubText: bool = meanCgSubTextBin > 0.5 and meanCgSubTextBin < 50
 
+        # the border needs Sobel and morphology, so only look for it when the cheap checks have passed
+        # except in debug mode, where the border flag is shown on every frame to help aligning its rectangle
+        hasCgSubBorder: bool = False
+        if self.debug or (hasCgSubContrast and hasCgSubText):
+            roiCgSubBorderGray = self.cgSubBorderRect.cutRoi(self.contentGray, self.contentRect)
+            roiCgSubBorderEdge = cv.convertScaleAbs(cv.Sobel(roiCgSubBorderGray, cv.CV_16S, 0, 1, ksize=3))
+            _, roiCgSubBorderEdgeBin = cv.threshold(roiCgSubBorderEdge, 5, 255, cv.THRESH_BINARY)
+            roiCgSubBorderBinErode = cv.morphologyEx(roiCgSubBorderEdgeBin, cv.MORPH_ERODE, kernel=self.cgSubBorderErodeKernel)
+            roiCgSubBorderRowReduce = cv.reduce(roiCgSubBorderBinErode, 1, cv.REDUCE_AVG, dtype=cv.CV_32F)
+            maxCgSubBorderRowReduce: float = cv.minMaxLoc(roiCgSubBorderRowReduce)[1]
+            hasCgSubBorder = maxCgSubBorderRowReduce > 200.0
+
         isValidCgSub = hasCgSubContrast and hasCgSubBorder and hasCgSubText
 
         framePoint.setFlag(MagirecoStrategy.FlagIndex.CgSub, isValidCgSub)
@@ -57,6 +57,10 @@ class ParakoStrategy(AbstractStrategy):
         self.iirPasses = collections.OrderedDict()
         self.iirPasses["iirPassFillGapDialog"] = IIRPassFillGap(ParakoStrategy.FlagIndex.Dialog, 300, meetPoint=1.3)
 
+    @classmethod
+    def supportsRoiScale(cls) -> bool:
+        return True
+
     @classmethod
     def getFlagIndexType(cls) -> typing.Type[AbstractFlagIndex]:
         return cls.FlagIndex
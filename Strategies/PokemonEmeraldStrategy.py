@@ -39,6 +39,10 @@ class PokemonEmeraldStrategy(AbstractStrategy):
         self.iirPasses = collections.OrderedDict()
         self.iirPasses["iirPassFillGapDialog"] = IIRPassFillGap(PokemonEmeraldStrategy.FlagIndex.Dialog, 300)
 
+    @classmethod
+    def supportsRoiScale(cls) -> bool:
+        return True
+
     @classmethod
     def getFlagIndexType(cls) -> typing.Type[AbstractFlagIndex]:
         return cls.FlagIndex
@@ -1,15 +1,16 @@
-import datetime
 import typing
 import cv2 as cv
 import numpy as np
 
 def formatTimestamp(timestamp: float) -> str:
-    dTimestamp = datetime.datetime.fromtimestamp(timestamp / 1000, datetime.timezone(datetime.timedelta()))
-    return dTimestamp.strftime("%H:%M:%S.%f")[:-4]
-
-def inRange(frame, lower: typing.List[int], upper: typing.List[int]):
-    # just a syntactic sugar
-    return cv.inRange(frame, np.array(lower), np.array(upper))
+    # timestamp in millisecs, formatted as HH:MM:SS.cc with hours wrapping around at 24 like a clock
+    # plain integer math, since this is called for every printed frame and every output interval
+    # rounds to microsecs before truncating to centisecs, as datetime did
+    centisecs = round(timestamp * 1000) // 10000
+    secs, centisecs = divmod(centisecs, 100)
+    mins, secs = divmod(secs, 60)
+    hours, mins = divmod(mins, 60)
+    return "{:02d}:{:02d}:{:02d}.{:02d}".format(hours % 24, mins, secs, centisecs)
 
 def cosineSimilarity(lhs: np.ndarray, rhs: np.ndarray):
     return np.dot(lhs, rhs) / (np.linalg.norm(lhs) * np.linalg.norm(rhs))